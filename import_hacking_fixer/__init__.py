@@ -10,7 +10,9 @@ from import_hacking_fixer.core import get_stdlib_modules
 from import_hacking_fixer.core import iter_python_files
 from import_hacking_fixer.core import normalize_import
 from import_hacking_fixer.core import process_file
+from import_hacking_fixer.core import process_files
 from import_hacking_fixer.core import process_imports
+from import_hacking_fixer.core import process_tree
 from import_hacking_fixer.core import rewrite_imports
 
 
@@ -28,5 +30,7 @@ __all__ = [
     "rewrite_imports",
     "find_import_block",
     "process_file",
+    "process_files",
+    "process_tree",
     "iter_python_files",
 ]
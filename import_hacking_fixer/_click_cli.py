@@ -0,0 +1,52 @@
+"""Click-based commands for import-hacking-fixer.
+
+Loaded lazily through ``import_hacking_fixer.cli.cli``; the ``ihf`` entry
+point itself uses argparse.
+"""
+
+from pathlib import Path
+import sys
+
+import click
+from import_hacking_fixer import cli as _cli
+from import_hacking_fixer.cli import _configure_logging
+from import_hacking_fixer.cli import _handle_files
+from import_hacking_fixer.cli import _maybe_run_formatters
+from import_hacking_fixer.cli import VERSION
+
+
+@click.group()
+@click.option("-v", "--verbose", is_flag=True, help="Increase verbosity.")
+@click.option("-q", "--quiet", is_flag=True, help="Suppress non-error output.")
+@click.version_option(version=VERSION, prog_name="import-hacking-fixer CLI")
+def cli(verbose: bool, quiet: bool) -> None:
+    """Check and fix Python imports (OpenStack style)."""
+    _configure_logging(verbose, quiet)
+
+
+@cli.command(help="Report import issues without modifying files.")
+@click.argument("path", type=click.Path(exists=True, file_okay=True, dir_okay=True))
+@click.option("--project-packages", default="", help="Comma-separated list of top-level project packages.")
+@click.option("--no-length-check", is_flag=True, help="Disable line-length validation (from flake8/black configs).")
+@click.option("--no-cache", is_flag=True, help="Do not reuse results cached for unchanged files.")
+def check(path: str, project_packages: str, no_length_check: bool, no_cache: bool) -> None:
+    _cli._CHECK_LENGTH = not no_length_check
+    _cli._USE_CACHE = not no_cache
+    exit_code = _handle_files(Path(path), project_packages, apply_changes=False)
+    sys.exit(exit_code)
+
+
+@cli.command(help="Fix import issues in place.")
+@click.argument("path", type=click.Path(exists=True, file_okay=True, dir_okay=True))
+@click.option("--project-packages", default="", help="Comma-separated list of top-level project packages.")
+@click.option("--no-length-check", is_flag=True, help="Disable line-length validation (from flake8/black configs).")
+@click.option("--no-cache", is_flag=True, help="Do not reuse results cached for unchanged files.")
+@click.option("--fsync", is_flag=True, help="fsync each rewritten file before replacing it.")
+def fix(path: str, project_packages: str, no_length_check: bool, no_cache: bool, fsync: bool) -> None:
+    """Fix imports and optionally format code."""
+    _cli._CHECK_LENGTH = not no_length_check
+    _cli._USE_CACHE = not no_cache
+    _cli._FSYNC = fsync
+    exit_code = _handle_files(Path(path), project_packages, apply_changes=True)
+    _maybe_run_formatters(Path(path))
+    sys.exit(exit_code)
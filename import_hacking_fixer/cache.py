@@ -0,0 +1,137 @@
+"""Result cache for import-hacking-fixer.
+
+This module stores the outcome of processing each file in a JSON index
+under the project root, so that files unchanged since the last run can be
+skipped with a stat and a dictionary lookup instead of being re-parsed.
+Files whose mtime changed but whose contents did not (e.g. after a fresh
+checkout) are recognised by a digest of their contents.
+"""
+
+import functools
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict
+from typing import FrozenSet
+from typing import List
+from typing import Optional
+from typing import Tuple
+
+CACHE_DIR_NAME = ".import_hacking_fixer_cache"
+
+# Bump whenever the checks change so that stale results are not reused
+_CACHE_VERSION = 3
+
+Result = Tuple[bool, List[Tuple[int, str]]]
+# (st_mtime_ns, st_size, max line length or 0)
+Signature = Tuple[int, int, int]
+
+
+@functools.lru_cache(maxsize=8)
+def settings_digest(stdlib: FrozenSet[str], project_pkgs: FrozenSet[str], apply: bool, check_length: bool) -> str:
+    """Return a digest of the settings that affect results, used to name the index."""
+    raw = "\0".join(sorted(stdlib)) + "\1" + "\0".join(sorted(project_pkgs))
+    raw += f"\1{_CACHE_VERSION}\1{apply}\1{check_length}"
+    return hashlib.blake2b(raw.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def project_root(path: Path) -> Path:
+    """Return the directory the cache is kept in for runs on path.
+
+    This is the nearest directory containing path (or path itself, if it is
+    a directory) that holds a pyproject.toml or .git, falling back to the
+    current working directory, so that runs on single files or
+    subdirectories of a project share one index.
+    """
+    start = path.resolve()
+    if not start.is_dir():
+        start = start.parent
+    for directory in (start, *start.parents):
+        if (directory / "pyproject.toml").is_file() or (directory / ".git").exists():
+            return directory
+    return Path.cwd()
+
+
+def index_path(root: Path, settings: str) -> Path:
+    """Return the index file for the given project root and settings digest."""
+    return root / CACHE_DIR_NAME / f"{settings}.json"
+
+
+def signature(file_path: Path, max_length: int = 0) -> Optional[Signature]:
+    """Return the signature of file_path, or None if it cannot be stat'ed."""
+    try:
+        st = os.stat(file_path)
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size, max_length
+
+
+def content_digest(source: str) -> str:
+    """Return the digest of a file's decoded contents stored in index entries."""
+    return hashlib.blake2b(source.encode("utf-8", "surrogatepass"), digest_size=16).hexdigest()
+
+
+def make_entry(sig: Signature, digest: str, result: Result) -> list:
+    """Return the index entry [*signature, digest, modified, warnings]."""
+    modified, warnings = result
+    return [*sig, digest, modified, warnings]
+
+
+def entry_result(entry: list) -> Result:
+    """Return the (modified, warnings) result stored in an index entry."""
+    return entry[4], [(lineno, msg) for lineno, msg in entry[5]]
+
+
+def load_index(index_file: Path) -> Dict[str, list]:
+    """Load an index mapping absolute paths to entries (see make_entry).
+
+    A missing or unreadable index is treated as empty.
+    """
+    try:
+        with open(index_file, "r", encoding="utf-8") as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return index if isinstance(index, dict) else {}
+
+
+def lookup(index: Dict[str, list], key: str, sig: Signature, file_path: Path) -> Optional[list]:
+    """Return the index entry for key if file_path is unchanged, else None.
+
+    A matching signature is enough. If only the mtime differs, the file is
+    read and its digest compared, and the entry is returned with the new
+    mtime so that the next run matches on the signature alone.
+    """
+    entry = index.get(key)
+    if not entry or len(entry) != 6 or tuple(entry[1:3]) != sig[1:]:
+        return None
+    if entry[0] != sig[0]:
+        try:
+            source = file_path.read_text()
+        except (OSError, ValueError):
+            return None
+        if content_digest(source) != entry[3]:
+            return None
+        entry = [sig[0], *entry[1:]]
+    return entry
+
+
+def save_index(index_file: Path, index: Dict[str, list]) -> None:
+    """Write index atomically. Failures are ignored, the cache is best effort."""
+    cache_dir = index_file.parent
+    tmp_path = cache_dir / f"{index_file.name}.{os.getpid()}.tmp"
+    try:
+        if not cache_dir.is_dir():
+            cache_dir.mkdir()
+            # Keep the cache out of version control, like pytest's cache dir
+            (cache_dir / ".gitignore").write_text("*\n")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        # Readers never see a partially written index
+        os.replace(tmp_path, index_file)
+    except OSError:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
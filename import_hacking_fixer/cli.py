@@ -1,25 +1,120 @@
 #!/usr/bin/env python3
-"""Command-line interface for import-hacking-fixer using Click."""
+"""Command-line interface for import-hacking-fixer.
 
-from importlib import metadata
+The installed ``ihf`` entry point parses arguments with argparse so that
+Click is not imported on the startup path. The Click group (``cli``) is
+still available from this module and is loaded on first access.
+"""
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import functools
 import logging
+import os
 from pathlib import Path
 import sys
+from typing import AbstractSet
+from typing import Dict
+from typing import List
+from typing import Optional
+from typing import Tuple
 
-import click
+from import_hacking_fixer import cache
 from import_hacking_fixer import core
-from import_hacking_fixer.core import run_code_formatter
+from import_hacking_fixer import style_rules
+
+
+@functools.lru_cache(maxsize=1)
+def _version() -> str:
+    """Return the version string, looking up package metadata on first use."""
+    # importlib.metadata scans sys.path, so only pay for it on --version
+    from importlib import metadata
+
+    try:
+        return f"import-hacking-fixer {metadata.version('import_hacking_fixer')}"
+    except Exception:
+        return "import-hacking-fixer"
+
 
+class _VersionAction(argparse.Action):
+    """argparse action printing the lazily computed version and exiting."""
 
-try:
-    VERSION = f"import-hacking-fixer {metadata.version('import_hacking_fixer')}"
-except Exception:
-    VERSION = "import-hacking-fixer"
+    def __init__(self, option_strings: List[str], dest: str = argparse.SUPPRESS, **kwargs) -> None:
+        super().__init__(option_strings, dest=dest, default=argparse.SUPPRESS, nargs=0, **kwargs)
+
+    def __call__(self, parser, namespace, values, option_string=None) -> None:
+        parser.exit(message=f"{_version()}\n")
 
 
 # Global setting toggled by CLI options
 _CHECK_LENGTH = True
+_FSYNC = False
+_USE_CACHE = True
+
+# Number of files handed to a worker process at a time
+_CHUNKSIZE = 32
+
+# Number of threads prefetching file contents within a batch
+_READ_AHEAD = 8
+
+# (modified, warnings, error, content digest)
+_Result = Tuple[bool, List[Tuple[int, str]], Optional[str], Optional[str]]
 
+# (stdlib, project_pkgs, apply_changes, check_length, fsync, with_digest)
+_BatchSettings = Tuple[AbstractSet[str], AbstractSet[str], bool, bool, bool, bool]
+
+
+def _read_source(file_path: Path) -> Optional[str]:
+    """Read a file for prefetching, returning None if it cannot be read.
+
+    Read errors are left for core.process_file to report when it retries.
+    """
+    try:
+        return file_path.read_text()
+    except Exception:
+        return None
+
+
+def _process_batch(file_paths: List[Path], settings: _BatchSettings) -> List[_Result]:
+    """Run core.process_file on a batch of paths, capturing any exception.
+
+    File contents are read ahead by a small thread pool (reads release the
+    GIL) while parsing happens on the calling thread. Used as the task of
+    core.map_in_workers, which ships settings to each worker process once.
+
+    Returns:
+        A list of (modified, warnings, error, digest) tuples, one per path,
+        where error is the exception message if processing failed, otherwise
+        None, and digest is the cache.content_digest of the processed source
+        if with_digest is True and the file could be prefetched.
+    """
+    stdlib, project_pkgs, apply_changes, check_length, fsync, with_digest = settings
+    results: List[_Result] = []
+    with ThreadPoolExecutor(max_workers=_READ_AHEAD) as readers:
+        sources = readers.map(_read_source, file_paths)
+        for file_path, source in zip(file_paths, sources):
+            try:
+                modified, warnings = core.process_file(
+                    str(file_path),
+                    stdlib,
+                    project_pkgs,
+                    apply=apply_changes,
+                    check_length=check_length,
+                    fsync=fsync,
+                    source=source,
+                )
+            except Exception as exc:
+                results.append((False, [], str(exc), None))
+                continue
+            write_errors = [msg for _, msg in warnings if msg.startswith(core.WRITE_ERROR)]
+            if write_errors:
+                # Reported as an error so that the result is never cached and
+                # the next run retries the write
+                results.append((False, [], "; ".join(write_errors), None))
+                continue
+            digest = cache.content_digest(source) if with_digest and source is not None else None
+            results.append((modified, warnings, None, digest))
+    return results
 
 
 def _handle_files(path: Path, project_packages: str, apply_changes: bool) -> int:
@@ -30,13 +125,15 @@ def _handle_files(path: Path, project_packages: str, apply_changes: bool) -> int
         project_packages: Comma-separated list of top-level project packages.
         apply_changes: If True, apply fixes in place.
     Returns:
-        0 if no changes, 1 if changes required, 2 if error occurred.
+        0 if clean, 1 if changes are required or warnings were reported,
+        2 if an error occurred.
     """
+    # Frozensets are hashable, which lets core memoize classification across files
     stdlib = core.get_stdlib_modules()
-    project_pkgs = set(filter(None, (p.strip() for p in project_packages.split(","))))
+    project_pkgs = frozenset(filter(None, (p.strip() for p in project_packages.split(","))))
 
     if not project_pkgs and path.is_dir():
-        project_pkgs = core.find_project_packages(str(path))
+        project_pkgs = frozenset(core.find_project_packages(str(path)))
 
     exit_code = 0
     total_warnings = 0
@@ -47,24 +144,85 @@ def _handle_files(path: Path, project_packages: str, apply_changes: bool) -> int
     else:
         file_paths = list(core.iter_python_files(str(path)))
 
-    for file_path in file_paths:
-        try:
-            modified, warnings = core.process_file(
-                str(file_path),
-                stdlib,
-                project_pkgs,
-                apply=apply_changes,
-                check_length=_CHECK_LENGTH,
-            )
-
-        except Exception as exc:
-            logging.error("[%s] ERROR: %s", file_path, exc)
+    # Results of files unchanged since the last run come from the index;
+    # only the remaining (pending) files are processed.
+    results: List[Optional[_Result]] = [None] * len(file_paths)
+    pending = list(range(len(file_paths)))
+    index_file = None
+    new_index: Dict[str, list] = {}
+    if _USE_CACHE:
+        settings = cache.settings_digest(stdlib, project_pkgs, apply_changes, _CHECK_LENGTH)
+        index_file = cache.index_path(cache.project_root(path), settings)
+        index = cache.load_index(index_file)
+        # Entries of files outside this run are kept; those under a processed
+        # directory are rebuilt below, which drops deleted files.
+        if path.is_dir():
+            prefix = os.path.join(os.path.abspath(path), "")
+            new_index = {key: entry for key, entry in index.items() if not key.startswith(prefix)}
+        else:
+            new_index = dict(index)
+            new_index.pop(os.path.abspath(path), None)
+        line_lengths: Dict[str, int] = {}
+        keys: List[str] = []
+        signatures: List[Optional[cache.Signature]] = []
+        pending = []
+        for i, file_path in enumerate(file_paths):
+            max_length = 0
+            if _CHECK_LENGTH:
+                # The configured line length can change without the file changing
+                parent = str(file_path.parent)
+                if parent not in line_lengths:
+                    line_lengths[parent] = style_rules.read_line_length_config(parent)
+                max_length = line_lengths[parent]
+            key = os.path.abspath(file_path)
+            sig = cache.signature(file_path, max_length)
+            keys.append(key)
+            signatures.append(sig)
+            entry = cache.lookup(index, key, sig, file_path) if sig is not None else None
+            if entry is None:
+                pending.append(i)
+            else:
+                results[i] = (*cache.entry_result(entry), None, None)
+                new_index[key] = entry
+
+    pending_paths = [file_paths[i] for i in pending]
+    batches = [pending_paths[i:i + _CHUNKSIZE] for i in range(0, len(pending_paths), _CHUNKSIZE)]
+    batch_settings: _BatchSettings = (stdlib, project_pkgs, apply_changes, _CHECK_LENGTH, _FSYNC, _USE_CACHE)
+    # Batches are already sized, so each is one task; a single batch runs in
+    # this process without starting a pool.
+    processed = [
+        result
+        for batch in core.map_in_workers(_process_batch, batches, batch_settings, chunksize=1)
+        for result in batch
+    ]
+    for i, result in zip(pending, processed):
+        results[i] = result
+
+    if index_file is not None:
+        for i, (modified, warnings, error, digest) in zip(pending, processed):
+            sig = signatures[i]
+            # Rewritten files get new contents, so their entry would never match
+            if error is None and sig is not None and digest is not None and not (apply_changes and modified):
+                new_index[keys[i]] = cache.make_entry(sig, digest, (modified, warnings))
+        # Also covers entries refreshed with a new mtime and deleted files
+        if new_index != index:
+            cache.save_index(index_file, new_index)
+
+    for file_path, outcome in zip(file_paths, results):
+        # Every slot is filled, either from the index or by a worker
+        assert outcome is not None
+        modified, warnings, error, _ = outcome
+        if error is not None:
+            logging.error("[%s] ERROR: %s", file_path, error)
             exit_code = max(exit_code, 2)
             continue
 
-        for lineno, msg in warnings:
-            logging.warning("[%s] line %s: %s", file_path, lineno, msg)
-            total_warnings += 1
+        if warnings:
+            # One logging call per file rather than per warning
+            logging.warning("\n".join(f"[{file_path}] line {lineno}: {msg}" for lineno, msg in warnings))
+            total_warnings += len(warnings)
+            # Hacking/style violations fail the run like unsorted imports do
+            exit_code = max(exit_code, 1)
 
         if modified:
             msg = "file updated." if apply_changes else "imports would be modified."
@@ -77,13 +235,8 @@ def _handle_files(path: Path, project_packages: str, apply_changes: bool) -> int
     return exit_code
 
 
-@click.group()
-@click.option("-v", "--verbose", is_flag=True, help="Increase verbosity.")
-@click.option("-q", "--quiet", is_flag=True, help="Suppress non-error output.")
-@click.version_option(version=VERSION, prog_name="import-hacking-fixer CLI")
-def cli(verbose: bool, quiet: bool) -> None:
-    """Check and fix Python imports (OpenStack style)."""
-    # Configure logging only once
+def _configure_logging(verbose: bool, quiet: bool) -> None:
+    """Configure root logging once according to the verbosity flags."""
     if not logging.getLogger().handlers:
         if quiet:
             logging.basicConfig(level=logging.ERROR, format="%(message)s")
@@ -91,48 +244,86 @@ def cli(verbose: bool, quiet: bool) -> None:
             logging.basicConfig(level=logging.DEBUG if verbose else logging.INFO, format="%(message)s")
 
 
-
-@cli.command(help="Report import issues without modifying files.")
-@click.argument("path", type=click.Path(exists=True, file_okay=True, dir_okay=True))
-@click.option("--project-packages", default="", help="Comma-separated list of top-level project packages.")
-@click.option("--no-length-check", is_flag=True, help="Disable line-length validation (from flake8/black configs).")
-def check(path: str, project_packages: str, no_length_check: bool) -> None:
-    global _CHECK_LENGTH
-    _CHECK_LENGTH = not no_length_check
-    exit_code = _handle_files(Path(path), project_packages, apply_changes=False)
-    sys.exit(exit_code)
-
-
-@cli.command(help="Fix import issues in place.")
-@click.argument("path", type=click.Path(exists=True, file_okay=True, dir_okay=True))
-@click.option("--project-packages", default="", help="Comma-separated list of top-level project packages.")
-@click.option("--no-length-check", is_flag=True, help="Disable line-length validation (from flake8/black configs).")
-def fix(path: str, project_packages: str, no_length_check: bool) -> None:
-    """Fix imports and optionally format code."""
-    global _CHECK_LENGTH
-    _CHECK_LENGTH = not no_length_check
-    exit_code = _handle_files(Path(path), project_packages, apply_changes=True)
-
-    # Import ici pour éviter circular import
-    from import_hacking_fixer.core import run_code_formatter
+def _maybe_run_formatters(path: Path) -> None:
+    """Offer to run Black/Flake8 on path after fixes."""
+    # Click is only needed for the interactive prompt
     import click
 
-    # Propose à l’utilisateur d’exécuter Black/Flake8
-    if click.confirm("Run code formatters (Black/Flake8) after fixes?", default=False):
+    try:
+        if not click.confirm("Run code formatters (Black/Flake8) after fixes?", default=False):
+            return
         formatter = click.prompt(
             "Select formatter",
             type=click.Choice(["black", "flake8", "both"], case_sensitive=False),
             default="both",
         )
-        run_code_formatter(str(path), formatter)
+    except click.Abort:
+        # No answer (e.g. stdin closed in a pre-commit hook): skip formatting
+        return
+    core.run_code_formatter(str(path), formatter)
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    """Build the argparse parser mirroring the Click commands."""
+    parser = argparse.ArgumentParser(prog="ihf", description="Check and fix Python imports (OpenStack style).")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Increase verbosity.")
+    parser.add_argument("-q", "--quiet", action="store_true", help="Suppress non-error output.")
+    parser.add_argument("--version", action=_VersionAction, help="Show the version and exit.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for name, help_text in (
+        ("check", "Report import issues without modifying files."),
+        ("fix", "Fix import issues in place."),
+    ):
+        subparser = subparsers.add_parser(name, help=help_text, description=help_text)
+        subparser.add_argument("path", help="File or directory to process.")
+        subparser.add_argument(
+            "--project-packages", default="", help="Comma-separated list of top-level project packages."
+        )
+        subparser.add_argument(
+            "--no-length-check",
+            action="store_true",
+            help="Disable line-length validation (from flake8/black configs).",
+        )
+        subparser.add_argument(
+            "--no-cache", action="store_true", help="Do not reuse results cached for unchanged files."
+        )
+        if name == "fix":
+            subparser.add_argument(
+                "--fsync", action="store_true", help="fsync each rewritten file before replacing it."
+            )
+    return parser
 
+
+def main(argv: Optional[List[str]] = None) -> None:
+    """Entry point for the CLI."""
+    global _CHECK_LENGTH, _FSYNC, _USE_CACHE
+    parser = _build_parser()
+    args = parser.parse_args(argv)
+    path = Path(args.path)
+    if not path.exists():
+        parser.error(f"path '{args.path}' does not exist.")
+
+    _configure_logging(args.verbose, args.quiet)
+    _CHECK_LENGTH = not args.no_length_check
+    _FSYNC = getattr(args, "fsync", False)
+    _USE_CACHE = not args.no_cache
+    apply_changes = args.command == "fix"
+    exit_code = _handle_files(path, args.project_packages, apply_changes=apply_changes)
+    if apply_changes:
+        _maybe_run_formatters(path)
     sys.exit(exit_code)
 
 
-def main():
-    """Entry point for the CLI."""
-    cli()
+def __getattr__(name: str):
+    """Load the Click commands and VERSION lazily to keep startup cheap."""
+    if name == "VERSION":
+        return _version()
+    if name in ("cli", "check", "fix"):
+        from import_hacking_fixer import _click_cli
+
+        return getattr(_click_cli, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 if __name__ == "__main__":
-    cli()
+    main()
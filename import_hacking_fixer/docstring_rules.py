@@ -1,42 +1,49 @@
 import ast
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 
+from import_hacking_fixer.parser import iter_statements
 
-def process_docstrings(source: str) -> Tuple[bool, List[Tuple[int, str]], str]:
+
+def process_docstrings(source: str, tree: Optional[ast.AST] = None) -> Tuple[bool, List[Tuple[int, str]], str]:
     """
     Process docstrings in the given source code and fix rule H405.
 
     Returns a tuple (modified, warnings, new_source).
     If a docstring is multi-line and the summary line is not followed by a blank line,
     this function will insert a blank line and return modified=True.
+    tree may pass the already parsed source to avoid parsing it again.
     """
-    tree = ast.parse(source)
+    if tree is None:
+        tree = ast.parse(source)
     lines = source.splitlines()
     warnings: List[Tuple[int, str]] = []
     modified = False
 
-    # Process docstrings in reverse order to avoid index shifting issues
+    # Docstrings to fix
     docstring_nodes = []
-    for node in ast.walk(tree):
-        if isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Module)):
-            doc = ast.get_docstring(node, clean=False)
-            if doc and "\n" in doc:
-                doc_lines = doc.splitlines()
-                # Only apply if the second line (index 1) is not empty
-                if len(doc_lines) > 1 and doc_lines[1].strip() != "":
-                    # Find the actual docstring node in the AST
-                    docstring_node = None
-                    if hasattr(node, "body") and node.body:
-                        for stmt in node.body:
-                            if isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Constant) and isinstance(stmt.value.value, str):
-                                docstring_node = stmt
-                                break
-                    
-                    if docstring_node:
-                        docstring_nodes.append((docstring_node, doc_lines))
+    for node in iter_statements(tree):
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef, ast.Module)):
+            continue
+        # Same test as ast.get_docstring(node, clean=False), done inline: the
+        # docstring is a string constant as the first statement of the body
+        stmt = node.body[0] if node.body else None
+        if not (isinstance(stmt, ast.Expr) and isinstance(stmt.value, ast.Constant)
+                and isinstance(stmt.value.value, str)):
+            continue
+        doc = stmt.value.value
+        if "\n" in doc:
+            doc_lines = doc.splitlines()
+            # Only apply if the second line (index 1) is not empty
+            if len(doc_lines) > 1 and doc_lines[1].strip() != "":
+                docstring_nodes.append((stmt, doc_lines))
 
-    # Process docstrings in reverse order (bottom to top) to avoid index shifting
-    for docstring_node, doc_lines in reversed(docstring_nodes):
+    # Build the output in one forward pass: unchanged lines are copied in
+    # runs between docstrings instead of splicing the list in place. That
+    # requires line order, so do not rely on the traversal order for it.
+    docstring_nodes.sort(key=lambda item: item[0].lineno)
+    new_lines: List[str] = []
+    cursor = 0
+    for docstring_node, doc_lines in docstring_nodes:
         # Get the original indentation from the source
         docstring_line_idx = docstring_node.lineno - 1
         original_line = lines[docstring_line_idx]
@@ -56,23 +63,25 @@ def process_docstrings(source: str) -> Tuple[bool, List[Tuple[int, str]], str]:
         # Find the end line of the docstring
         end_line_idx = docstring_node.end_lineno - 1  # type: ignore
         
+        # Copy the unchanged lines since the previous docstring
+        new_lines.extend(lines[cursor:docstring_line_idx])
+
         # Create new docstring lines - single docstring with blank line inside
-        new_doc_lines = []
-        new_doc_lines.append(indent + '"""' + summary)
-        new_doc_lines.append(indent)  # Empty line after summary (no closing quotes!)
+        new_lines.append(indent + '"""' + summary)
+        new_lines.append(indent)  # Empty line after summary (no closing quotes!)
         
         # Add the rest of the docstring - preserve original indentation
         for line in rest:
             # Strip leading whitespace from the original line and re-add base indent
-            new_doc_lines.append(indent + line.lstrip())
+            new_lines.append(indent + line.lstrip())
         
-        new_doc_lines.append(indent + '"""')
+        new_lines.append(indent + '"""')
         
-        # Replace the docstring lines
-        lines[docstring_line_idx:end_line_idx + 1] = new_doc_lines
+        cursor = end_line_idx + 1
         modified = True
 
-    new_source = "\n".join(lines)
+    new_lines.extend(lines[cursor:])
+    new_source = "\n".join(new_lines)
     return modified, warnings, new_source
 
 
@@ -4,7 +4,11 @@ This module provides functions to extract import statements from Python files.
 """
 
 import ast
+import functools
+import os
+from typing import Iterator
 from typing import List
+from typing import Tuple
 
 
 
@@ -29,16 +33,53 @@ def extract_imports_from_file(file_path: str) -> List[ast.stmt]:
     Raises:
         SyntaxError: If the Python file contains invalid syntax.
     """
+    st = os.stat(file_path)
+    # A new list each call, though the nodes in it are shared between calls
+    return list(_parse_imports(file_path, st.st_mtime_ns, st.st_size))
+
+
+@functools.lru_cache(maxsize=128)
+def _parse_imports(file_path: str, mtime_ns: int, size: int) -> Tuple[ast.stmt, ...]:
+    """Parse file_path and return its imports, cached by path and stat signature.
+
+    A file that is modified gets a new (mtime_ns, size) key, so stale
+    entries are never returned; they simply age out of the cache.
+    """
     with open(file_path, "r", encoding="utf-8") as f:
         source = f.read()
 
     # Parse the source code into an AST
     tree = ast.parse(source, filename=file_path)
 
-    # Walk the AST and collect all import statements
-    imports: List[ast.stmt] = []
-    for node in ast.walk(tree):
-        if isinstance(node, (ast.Import, ast.ImportFrom)):
-            imports.append(node)
+    return tuple(_iter_imports(tree))
+
 
-    return imports
+# Fields holding nested statement lists, in the order they appear in the
+# source (ExceptHandler and match_case nodes are reached through 'handlers'
+# and 'cases'). Reversed for pushing onto the stack.
+_STATEMENT_FIELDS = ('body', 'handlers', 'orelse', 'finalbody', 'cases')
+_REVERSED_STATEMENT_FIELDS = _STATEMENT_FIELDS[::-1]
+
+
+def iter_statements(tree: ast.AST) -> Iterator[ast.AST]:
+    """Yield tree and every statement nested in it, in source order.
+
+    Only statement lists are descended into; expressions, which make up
+    most of a module's nodes, are never visited. Use this instead of
+    ast.walk when looking for statements such as imports or definitions.
+    """
+    stack: List[ast.AST] = [tree]
+    while stack:
+        node = stack.pop()
+        yield node
+        # Fields and their children are pushed last to first so that the
+        # stack pops them in source order
+        for field in _REVERSED_STATEMENT_FIELDS:
+            children = getattr(node, field, None)
+            if type(children) is list:
+                stack.extend(reversed(children))
+
+
+def _iter_imports(tree: ast.AST) -> List[ast.stmt]:
+    """Return the import statements in tree, in source order."""
+    return [node for node in iter_statements(tree) if isinstance(node, (ast.Import, ast.ImportFrom))]
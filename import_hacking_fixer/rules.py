@@ -6,9 +6,9 @@ Currently includes a basic classification of imports into standard library, thir
 """
 
 import ast
+import functools
 import importlib.util
-from pathlib import Path
-import pkgutil
+import os
 import sys
 import sysconfig
 from typing import Dict
@@ -26,15 +26,22 @@ from typing import List
 
 def _get_stdlib_modules() -> set:
     """Return a set of module names that are part of the Python standard library."""
-    stdlib_path = Path(sysconfig.get_paths()['stdlib'])
+    stdlib_names = getattr(sys, 'stdlib_module_names', None)
+    if stdlib_names is not None:
+        # Python 3.10+ ships the list with the interpreter, no filesystem access needed
+        return set(sys.builtin_module_names) | set(stdlib_names)
+    stdlib_path = sysconfig.get_paths()['stdlib']
     modules = set(sys.builtin_module_names)
-    # include pure python modules in stdlib directory
-    for p in stdlib_path.glob('*.py'):
-        modules.add(p.stem)
-    # include package directories with __init__.py
-    for d in stdlib_path.iterdir():
-        if d.is_dir() and (d / '__init__.py').exists():
-            modules.add(d.name)
+    # One scandir pass covers both cases; DirEntry caches the dirent type,
+    # so only package candidates pay for the __init__.py stat.
+    with os.scandir(stdlib_path) as it:
+        for entry in it:
+            # include pure python modules in stdlib directory
+            if entry.name.endswith('.py') and entry.is_file():
+                modules.add(entry.name[:-3])
+            # include package directories with __init__.py
+            elif entry.is_dir() and os.path.exists(os.path.join(entry.path, '__init__.py')):
+                modules.add(entry.name)
     return modules
 
 
@@ -51,10 +58,11 @@ def classify_import(node: ast.stmt) -> str:
     Returns:
         A string representing the classification of the import.
     """
-    # Determine module name for import statement
-    if isinstance(node, ast.Import):
+    # Determine module name for import statement; AST node classes are not
+    # subclassed, so an identity check on the type is enough
+    if type(node) is ast.Import:
         name = node.names[0].name.split('.')[0]
-    elif isinstance(node, ast.ImportFrom):
+    elif type(node) is ast.ImportFrom:
         # Relative import (level > 0) or missing module is considered local
         if node.level and node.level > 0:
             return 'local'
@@ -64,10 +72,63 @@ def classify_import(node: ast.stmt) -> str:
     else:
         raise ValueError("Unsupported node type for import classification")
 
+    return _classify_name(name)
+
+
+@functools.lru_cache(maxsize=1)
+def _path_buckets() -> Dict[str, str]:
+    """Map top-level names found on sys.path to 'local' or 'third_party'.
+
+    Built with one scandir pass per sys.path entry: names under the current
+    working directory are local, everything else is third party. The first
+    entry providing a name wins, as it does for the import system. Names
+    this cannot see (namespace packages, zip or .pth installs) are left to
+    find_spec in _classify_name.
+    """
+    stdlib_dirs = {os.path.realpath(sysconfig.get_paths()[key]) for key in ('stdlib', 'platstdlib')}
+    project_root = os.path.join(os.path.realpath(os.getcwd()), '')
+    buckets: Dict[str, str] = {}
+    for entry_path in sys.path:
+        # Resolved like the cwd, so a project reached through a symlinked
+        # directory (e.g. /var -> /private/var on macOS) is still local
+        entry_path = os.path.realpath(entry_path or os.curdir)
+        if entry_path in stdlib_dirs:
+            # Standard library names are recognised by _STDLIB_MODULES
+            continue
+        bucket = 'local' if os.path.join(entry_path, '').startswith(project_root) else 'third_party'
+        try:
+            with os.scandir(entry_path) as it:
+                for entry in it:
+                    name = entry.name
+                    if name.endswith(('.py', '.so', '.pyd')) and entry.is_file():
+                        # Also covers extension modules such as name.cpython-311-x86_64-linux-gnu.so
+                        name = name.partition('.')[0]
+                    elif not (entry.is_dir() and os.path.exists(os.path.join(entry.path, '__init__.py'))):
+                        continue
+                    if name.isidentifier():
+                        buckets.setdefault(name, bucket)
+        except OSError:
+            continue
+    return buckets
+
+
+@functools.lru_cache(maxsize=None)
+def _classify_name(name: str) -> str:
+    """Classify a top-level module name, see classify_import.
+
+    Most names are resolved from the _path_buckets map; find_spec, which
+    searches sys.path on every call, is only the fallback. Results are
+    cached per name for the life of the process; call cache_clear() on
+    both functions after changing sys.path or the working directory.
+    """
     # Standard library modules (including built-ins)
     if name in _STDLIB_MODULES:
         return 'stdlib'
 
+    bucket = _path_buckets().get(name)
+    if bucket is not None:
+        return bucket
+
     # Determine if module is local or third party
     spec = importlib.util.find_spec(name)
     if spec is None:
@@ -80,9 +141,10 @@ def classify_import(node: ast.stmt) -> str:
 
     # Determine if the module's origin is within the current working directory
     try:
-        project_root = Path.cwd().resolve()
-        origin_path = Path(origin).resolve()
-        if str(origin_path).startswith(str(project_root)):
+        # Compare resolved paths as plain strings; this runs once per
+        # distinct name, behind the lru_cache.
+        project_root = os.path.join(os.path.realpath(os.getcwd()), '')
+        if os.path.realpath(origin).startswith(project_root):
             return 'local'
     except Exception:
         # Fall back to third party
@@ -99,8 +161,9 @@ def split_imports(imports: List[ast.stmt]) -> dict:
     Returns:
         A dictionary with keys 'stdlib', 'third_party', and 'local' mapping to lists of imports.
     """
-    grouped = {'stdlib': [], 'third_party': [], 'local': []}
+    grouped: Dict[str, List[ast.stmt]] = {'stdlib': [], 'third_party': [], 'local': []}
+    # Bind each list's append once instead of looking it up per node
+    appends = {category: nodes.append for category, nodes in grouped.items()}
     for node in imports:
-        category = classify_import(node)
-        grouped[category].append(node)
+        appends[classify_import(node)](node)
     return grouped
@@ -1,48 +1,87 @@
+import functools
+import os
 import re
 from pathlib import Path
+from typing import Optional
 
 try:
     import tomllib  # Python 3.11+
 except ModuleNotFoundError:
-    import tomli as tomllib  # Backport for Python <3.11
+    import tomli as tomllib  # type: ignore  # Backport for Python <3.11
 
+# Bytes pattern: config files are scanned without decoding them
+_MAX_LINE_LENGTH_RE = re.compile(rb"max-line-length\s*=\s*(\d+)")
 
+
+@functools.lru_cache(maxsize=None)
 def read_line_length_config(root: str) -> int:
-    """Detect max line length from flake8/black configs or use default."""
-    root = Path(root)
+    """Detect max line length from flake8/black configs or use default.
+
+    The result is cached per directory, files in one directory share it.
+    """
+    root_path = Path(root)
     default_length = 79
 
-    toml_path = root / "pyproject.toml"
-    if toml_path.exists():
-        try:
-            with open(toml_path, "rb") as f:
-                data = tomllib.load(f)
-            if "tool" in data:
-                black_cfg = data["tool"].get("black", {})
-                flake_cfg = data["tool"].get("flake8", {})
-                return black_cfg.get("line-length") or flake_cfg.get("max-line-length") or default_length
-        except Exception:
-            pass
+    # Open the candidates directly rather than stat'ing them first; a missing
+    # file costs one failed open instead of an exists() check plus the read.
+    try:
+        with open(root_path / "pyproject.toml", "rb") as f:
+            raw = f.read()
+        # Both keys contain "line-length"; most projects set neither, and a
+        # substring search is far cheaper than parsing the TOML
+        data = tomllib.loads(raw.decode("utf-8")) if b"line-length" in raw else {}
+        if "tool" in data:
+            black_cfg = data["tool"].get("black", {})
+            flake_cfg = data["tool"].get("flake8", {})
+            length = black_cfg.get("line-length") or flake_cfg.get("max-line-length")
+            # Otherwise fall through to setup.cfg/tox.ini, exactly as when
+            # the file was not parsed at all
+            if length:
+                return length
+    except Exception:
+        pass
 
     for cfg_name in ("setup.cfg", "tox.ini"):
-        cfg = root / cfg_name
-        if cfg.exists():
-            for line in cfg.read_text().splitlines():
-                m = re.match(r"max-line-length\s*=\s*(\d+)", line)
+        try:
+            cfg_file = open(root_path / cfg_name, "rb")
+        except FileNotFoundError:
+            continue
+        with cfg_file:
+            for line in cfg_file:
+                m = _MAX_LINE_LENGTH_RE.match(line)
                 if m:
                     return int(m.group(1))
 
     return default_length
 
 
-def check_line_length(file_path: str, max_length: int) -> list[tuple[int, str]]:
-    """Return list of (lineno, message) for long lines."""
-    warnings = []
+def check_line_length(file_path: str, max_length: int, source: Optional[str] = None) -> list[tuple[int, str]]:
+    """Return list of (lineno, message) for long lines.
+
+    If source is given it is checked instead of reading file_path again.
+    """
+    warnings: list[tuple[int, str]] = []
 
-    with open(file_path, encoding="utf-8") as f:
-        for i, line in enumerate(f, 1):
-            if len(line.rstrip("\n")) > max_length:
-                warnings.append((i, f"E501: line too long ({len(line)} > {max_length})"))
+    if source is None:
+        # A file with no more bytes than the limit cannot hold a long line
+        if os.path.getsize(file_path) <= max_length:
+            return warnings
+        with open(file_path, "rb") as f:
+            data = f.read()
+        # Byte lengths bound character lengths, so clean files need no decoding
+        if max(map(len, data.split(b"\n"))) <= max_length:
+            return warnings
+        # Same newline translation as reading in text mode
+        source = data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
+    if len(source) <= max_length:
+        return warnings
+    lines = source.split("\n")
+    # Most files have no long lines; find that out in one C-level pass
+    if max(map(len, lines)) <= max_length:
+        return warnings
+    for i, line in enumerate(lines, 1):
+        if len(line) > max_length:
+            warnings.append((i, f"E501: line too long ({len(line)} > {max_length})"))
 
     return warnings
 
@@ -0,0 +1,18 @@
+"""Optional build hook for compiling import_hacking_fixer.core with mypyc.
+
+Project metadata lives in pyproject.toml. Set IHF_USE_MYPYC=1 (with mypy
+installed) to build ``core`` as a C extension; otherwise the pure-Python
+module is installed unchanged.
+"""
+
+import os
+
+from setuptools import setup
+
+ext_modules = []
+if os.environ.get("IHF_USE_MYPYC") == "1":
+    from mypyc.build import mypycify
+
+    ext_modules = mypycify(["import_hacking_fixer/core.py"])
+
+setup(ext_modules=ext_modules)
@@ -41,11 +41,11 @@ def test_process_file_sorts_and_splits_imports(tmp_path):
     # Only check that imports are sorted alphabetically within stdlib
     expected_lines = [
         "import logging",
+        "from math import sin",
+        "from math import sqrt",
         "import os",
         "import random",
         "import sys",
-        "from math import sin",
-        "from math import sqrt",
     ]
 
 
@@ -70,3 +70,376 @@ def test_classify_project_imports(tmp_path):
     # mypkg import should be converted to 'from mypkg import module'
     assert "import os" in new_content
     assert "from mypkg import module" in new_content
+
+
+def test_find_project_packages_includes_namespace_packages(tmp_path):
+    (tmp_path / "regular").mkdir()
+    (tmp_path / "regular" / "__init__.py").write_text("")
+    (tmp_path / "nspkg").mkdir()
+    (tmp_path / "nspkg" / "mod.py").write_text("")
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "docs" / "index.rst").write_text("")
+    (tmp_path / "venv").mkdir()
+    (tmp_path / "venv" / "activate_this.py").write_text("")
+    assert import_hacking_fixer.find_project_packages(str(tmp_path)) == {"regular", "nspkg"}
+
+
+def test_iter_python_files_skips_ignored(tmp_path):
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "a.py").write_text("")
+    (tmp_path / "pkg" / "notes.txt").write_text("")
+    (tmp_path / "generated").mkdir()
+    (tmp_path / "generated" / "b.py").write_text("")
+    (tmp_path / "c.py").write_text("")
+    found = sorted(p.name for p in import_hacking_fixer.iter_python_files(str(tmp_path), ignore=["generated"]))
+    assert found == ["a.py", "c.py"]
+
+
+def test_iter_python_files_ignores_exact_paths_from_relative_root(tmp_path, monkeypatch):
+    for name in ("gen", "generated"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / f"{name}.py").write_text("")
+    monkeypatch.chdir(tmp_path)
+    found = [p.name for p in import_hacking_fixer.iter_python_files(".", ignore=["gen/"])]
+    assert found == ["generated.py"]
+
+
+def test_iter_python_files_prunes_default_excludes(tmp_path):
+    for name in (".git", ".venv", "__pycache__", "build"):
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "skipped.py").write_text("")
+    (tmp_path / "kept.py").write_text("")
+    found = [p.name for p in import_hacking_fixer.iter_python_files(str(tmp_path))]
+    assert found == ["kept.py"]
+
+
+def test_process_file_leaves_sorted_imports_untouched(tmp_path):
+    content = "import os\nimport sys\n\nimport click\n\nprint(os, sys, click)\n"
+    tmp_file = tmp_path / "f.py"
+    tmp_file.write_text(content)
+    stdlib = import_hacking_fixer.get_stdlib_modules()
+    modified, warnings = import_hacking_fixer.process_file(str(tmp_file), stdlib, set(), apply=True)
+    assert not modified
+    assert tmp_file.read_text() == content
+
+
+def test_process_file_ignores_nested_imports(tmp_path):
+    content = "import sys\nimport os\n\n\ndef f():\n    import json\n    return json\n"
+    tmp_file = tmp_path / "f.py"
+    tmp_file.write_text(content)
+    stdlib = import_hacking_fixer.get_stdlib_modules()
+    modified, _ = import_hacking_fixer.process_file(str(tmp_file), stdlib, set(), apply=True)
+    assert modified
+    result = tmp_file.read_text()
+    assert result.startswith("import os\nimport sys\n")
+    assert result.count("import json") == 1
+
+
+def test_process_file_keeps_import_aliases(tmp_path):
+    content = "import sys as system\nimport os.path as osp\n"
+    tmp_file = tmp_path / "f.py"
+    tmp_file.write_text(content)
+    stdlib = import_hacking_fixer.get_stdlib_modules()
+    import_hacking_fixer.process_file(str(tmp_file), stdlib, set(), apply=True)
+    cleaned_result = [line for line in tmp_file.read_text().splitlines() if line.strip()]
+    assert cleaned_result == ["from os import path as osp", "import sys as system"]
+
+
+def test_cli_main_check_reports_without_click(tmp_path):
+    import os
+    import subprocess
+    import sys
+
+    tmp_file = tmp_path / "f.py"
+    tmp_file.write_text("import sys\nimport os\n")
+    code = (
+        "import sys\n"
+        "from import_hacking_fixer import cli\n"
+        "try:\n"
+        "    cli.main(['check', sys.argv[1]])\n"
+        "except SystemExit as exc:\n"
+        "    print(exc.code, 'click' in sys.modules)\n"
+    )
+    env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.dirname(import_hacking_fixer.__file__)))
+    # Run from tmp_path so the result cache is not written into this checkout
+    out = subprocess.run(
+        [sys.executable, "-c", code, str(tmp_file)], capture_output=True, text=True, cwd=tmp_path, env=env
+    )
+    assert out.stdout.split() == ["1", "False"]
+    assert tmp_file.read_text() == "import sys\nimport os\n"
+
+
+def test_process_tree_processes_all_files(tmp_path):
+    (tmp_path / "a.py").write_text("import sys\nimport os\n")
+    (tmp_path / "b.py").write_text("import os\n")
+    stdlib = import_hacking_fixer.get_stdlib_modules()
+    results = {
+        path.name: modified
+        for path, modified, _ in import_hacking_fixer.process_tree(str(tmp_path), stdlib, set(), workers=2)
+    }
+    assert results == {"a.py": True, "b.py": False}
+
+
+def test_handle_files_reuses_cached_results(tmp_path, monkeypatch):
+    import os
+
+    from import_hacking_fixer import cli, core
+
+    (tmp_path / "pyproject.toml").write_text("")
+    (tmp_path / "mod.py").write_text("import sys\nimport os\n")
+    assert cli._handle_files(tmp_path, "", apply_changes=False) == 1
+    assert (tmp_path / ".import_hacking_fixer_cache" / ".gitignore").is_file()
+
+    def fail(*args, **kwargs):
+        raise AssertionError("cached result was not used")
+
+    monkeypatch.setattr(core, "process_file", fail)
+    assert cli._handle_files(tmp_path, "", apply_changes=False) == 1
+    # A new mtime with the same contents (e.g. a fresh checkout) still hits
+    os.utime(tmp_path / "mod.py", ns=(0, 0))
+    assert cli._handle_files(tmp_path, "", apply_changes=False) == 1
+
+
+def test_process_imports_drops_duplicate_imports():
+    import ast
+
+    tree = ast.parse("import os\nimport sys\nimport os\n")
+    stdlib = import_hacking_fixer.get_stdlib_modules()
+    _, lines, _ = import_hacking_fixer.process_imports(tree, stdlib, set())
+    assert lines == ["import os", "import sys", ""]
+
+
+def test_process_files_keeps_input_order(tmp_path):
+    paths = []
+    for index in range(5):
+        path = tmp_path / f"m{index}.py"
+        path.write_text("import sys\nimport os\n" if index % 2 else "import os\n")
+        paths.append(path)
+    stdlib = import_hacking_fixer.get_stdlib_modules()
+    results = list(import_hacking_fixer.process_files(paths, stdlib, set(), workers=2))
+    assert [(path, modified) for path, modified, _ in results] == [(path, bool(i % 2)) for i, path in enumerate(paths)]
+
+
+def test_process_file_flags_docstring_with_escaped_newline(tmp_path):
+    tmp_file = tmp_path / "mod.py"
+    tmp_file.write_text('def f():\n    "Summary.\\nDetails."\n')
+    modified, warnings = import_hacking_fixer.process_file(str(tmp_file), set(), set(), check_length=False)
+    assert modified
+    assert any(msg.startswith("H405") for _, msg in warnings)
+
+
+def test_process_docstrings_fixes_nested_and_later_docstrings():
+    from import_hacking_fixer.docstring_rules import process_docstrings
+
+    source = (
+        'class A:\n    def m(self):\n        """Summary.\n        more."""\n\n\n'
+        'def g():\n    """Summary.\n    more."""\n'
+    )
+    modified, warnings, new_source = process_docstrings(source)
+    assert modified
+    assert [lineno for lineno, _ in warnings] == [3, 8]
+    assert new_source.splitlines()[-5:] == ["def g():", '    """Summary.', "    ", "    more.", '    """']
+
+
+def test_process_file_fixes_module_docstring_and_imports(tmp_path):
+    tmp_file = tmp_path / "mod.py"
+    tmp_file.write_text('"""Summary.\nDetails."""\nimport sys\nimport os\n\n\ndef f():\n    """Doc.\n    More."""\n')
+    stdlib = import_hacking_fixer.get_stdlib_modules()
+    modified, _ = import_hacking_fixer.process_file(str(tmp_file), stdlib, set(), apply=True, check_length=False)
+    assert modified
+    assert tmp_file.read_text() == (
+        '"""Summary.\n\nDetails.\n"""\nimport os\nimport sys\n\n\n'
+        'def f():\n    """Doc.\n    \n    More.\n    """\n'
+    )
+
+
+def test_process_file_keeps_wildcard_and_relative_imports(tmp_path):
+    tmp_file = tmp_path / "mod.py"
+    tmp_file.write_text("import sys\nfrom os.path import *\nimport os\nfrom . import sibling\n\nx = 1\n")
+    stdlib = import_hacking_fixer.get_stdlib_modules()
+    modified, warnings = import_hacking_fixer.process_file(str(tmp_file), stdlib, set(), apply=True, check_length=False)
+    assert modified
+    assert {msg[:4] for _, msg in warnings} >= {"H303", "H304"}
+    assert tmp_file.read_text() == "import os\nfrom os.path import *\nimport sys\n\nfrom . import sibling\n\nx = 1\n"
+
+
+def test_process_file_reports_long_lines(tmp_path):
+    tmp_file = tmp_path / "mod.py"
+    tmp_file.write_text("import os\n\nx = '" + "a" * 100 + "'\n")
+    stdlib = import_hacking_fixer.get_stdlib_modules()
+    modified, warnings = import_hacking_fixer.process_file(str(tmp_file), stdlib, set())
+    assert not modified
+    assert warnings == [(3, "E501: line too long (106 > 79)")]
+
+
+def test_process_file_checks_imports_outside_the_leading_block(tmp_path):
+    tmp_file = tmp_path / "mod.py"
+    content = (
+        "try:\n    import json\nexcept ImportError:\n    from .compat import json\n\n\n"
+        "def f():\n    from os.path import *\n    import sys, re\n"
+    )
+    tmp_file.write_text(content)
+    stdlib = import_hacking_fixer.get_stdlib_modules()
+    modified, warnings = import_hacking_fixer.process_file(str(tmp_file), stdlib, set(), apply=True, check_length=False)
+    assert not modified
+    assert [(lineno, msg[:4]) for lineno, msg in warnings] == [(4, "H304"), (8, "H303"), (9, "H301")]
+    assert tmp_file.read_text() == content
+
+
+def test_process_file_reports_syntax_errors_after_the_imports(tmp_path):
+    tmp_file = tmp_path / "mod.py"
+    tmp_file.write_text("import os\n\n\ndef f(:\n    pass\n")
+    stdlib = import_hacking_fixer.get_stdlib_modules()
+    modified, warnings = import_hacking_fixer.process_file(str(tmp_file), stdlib, set())
+    assert not modified
+    assert warnings == [(4, "Syntax error: invalid syntax")]
+
+
+def test_process_file_writes_through_symlinks(tmp_path):
+    (tmp_path / "real").mkdir()
+    real_file = tmp_path / "real" / "m.py"
+    real_file.write_text("import sys\nimport os\n")
+    link = tmp_path / "link.py"
+    link.symlink_to(real_file)
+    stdlib = import_hacking_fixer.get_stdlib_modules()
+    modified, _ = import_hacking_fixer.process_file(str(link), stdlib, set(), apply=True, check_length=False)
+    assert modified
+    assert link.is_symlink()
+    assert real_file.read_text() == "import os\nimport sys\n"
+    assert sorted(p.name for p in (tmp_path / "real").iterdir()) == ["m.py"]
+
+
+def test_cli_check_exits_non_zero_on_warnings_only(tmp_path, monkeypatch):
+    import pytest
+
+    from import_hacking_fixer import cli
+
+    for name in ("_CHECK_LENGTH", "_FSYNC", "_USE_CACHE"):
+        monkeypatch.setattr(cli, name, getattr(cli, name))
+    relative = tmp_path / "rel.py"
+    relative.write_text("from . import x\n")
+    long_line = tmp_path / "long.py"
+    long_line.write_text("x = '" + "a" * 100 + "'\n")
+    clean = tmp_path / "clean.py"
+    clean.write_text("import os\n")
+    for path, expected in ((relative, 1), (long_line, 1), (clean, 0)):
+        with pytest.raises(SystemExit) as exc:
+            cli.main(["check", "--no-cache", str(path)])
+        assert exc.value.code == expected
+
+
+def test_handle_files_shares_one_index_per_project(tmp_path):
+    import os
+
+    from import_hacking_fixer import cache, cli
+
+    (tmp_path / ".git").mkdir()
+    pkg = tmp_path / "src" / "pkg"
+    pkg.mkdir(parents=True)
+    (pkg / "a.py").write_text("import os\n")
+    (pkg / "b.py").write_text("import sys\nimport os\n")
+    assert cli._handle_files(pkg / "a.py", "", apply_changes=False) == 0
+    assert cli._handle_files(pkg / "b.py", "", apply_changes=False) == 1
+    assert not (pkg / cache.CACHE_DIR_NAME).exists()
+    (index_file,) = (tmp_path / cache.CACHE_DIR_NAME).glob("*.json")
+    assert sorted(os.path.basename(key) for key in cache.load_index(index_file)) == ["a.py", "b.py"]
+
+
+def test_handle_files_processes_batches_in_workers(tmp_path, monkeypatch):
+    from import_hacking_fixer import cli
+
+    monkeypatch.setattr(cli, "_USE_CACHE", False)
+    monkeypatch.setattr(cli, "_CHUNKSIZE", 2)
+    for index in range(5):
+        (tmp_path / f"m{index}.py").write_text("import os\n")
+    assert cli._handle_files(tmp_path, "", apply_changes=False) == 0
+    (tmp_path / "m3.py").write_text("import sys\nimport os\n")
+    assert cli._handle_files(tmp_path, "", apply_changes=False) == 1
+
+
+def test_process_file_fixes_docstrings_in_both_branches(tmp_path):
+    tmp_file = tmp_path / "mod.py"
+    tmp_file.write_text(
+        'if True:\n    def f():\n        """Summary.\n        more."""\n'
+        'else:\n    def f():\n        """Other.\n        more."""\n\n\n'
+        'def g():\n    """Last.\n    more."""\n'
+    )
+    modified, warnings = import_hacking_fixer.process_file(str(tmp_file), set(), set(), apply=True, check_length=False)
+    assert modified
+    result = tmp_file.read_text()
+    compile(result, str(tmp_file), "exec")
+    assert result.count("def f():") == 2
+    assert result.count("def g():") == 1
+    assert result.count("    \n") == 3
+
+
+def test_handle_files_retries_failed_writes(tmp_path, monkeypatch):
+    from import_hacking_fixer import cli, core
+
+    (tmp_path / "pyproject.toml").write_text("")
+    tmp_file = tmp_path / "mod.py"
+    tmp_file.write_text("import sys\nimport os\n")
+
+    def fail(*args, **kwargs):
+        raise OSError("disk full")
+
+    with monkeypatch.context() as patch:
+        patch.setattr(core, "_write_atomic", fail)
+        assert cli._handle_files(tmp_path, "", apply_changes=True) == 2
+    assert tmp_file.read_text() == "import sys\nimport os\n"
+    assert cli._handle_files(tmp_path, "", apply_changes=True) == 1
+    assert tmp_file.read_text() == "import os\nimport sys\n"
+
+
+def test_iter_python_files_skips_unreadable_directories(tmp_path, monkeypatch):
+    import os
+
+    (tmp_path / "locked").mkdir()
+    (tmp_path / "locked" / "hidden.py").write_text("")
+    (tmp_path / "kept.py").write_text("")
+    real_scandir = os.scandir
+
+    def scandir(path):
+        if os.path.basename(path) == "locked":
+            raise PermissionError(path)
+        return real_scandir(path)
+
+    monkeypatch.setattr(os, "scandir", scandir)
+    assert [p.name for p in import_hacking_fixer.iter_python_files(str(tmp_path))] == ["kept.py"]
+    assert import_hacking_fixer.find_project_packages(str(tmp_path)) == set()
+
+
+def test_process_file_keeps_comments_in_the_import_block(tmp_path):
+    stdlib = import_hacking_fixer.get_stdlib_modules()
+    tmp_file = tmp_path / "mod.py"
+    content = "import os\n\n# third party\nimport requests  # noqa\n"
+    tmp_file.write_text(content)
+    assert import_hacking_fixer.process_file(str(tmp_file), stdlib, set(), apply=True) == (False, [])
+    assert tmp_file.read_text() == content
+
+    unsorted = "import sys\n# more stdlib\nimport os\n"
+    tmp_file.write_text(unsorted)
+    modified, warnings = import_hacking_fixer.process_file(str(tmp_file), stdlib, set())
+    assert modified
+    assert warnings == [(1, "Import order/style is incorrect.")]
+    modified, warnings = import_hacking_fixer.process_file(str(tmp_file), stdlib, set(), apply=True)
+    assert not modified
+    assert [msg for _, msg in warnings] == ["Import order/style is incorrect (not fixed: the import block has comments)."]
+    assert tmp_file.read_text() == unsorted
+
+
+def test_map_in_workers_caps_workers_at_item_count(monkeypatch):
+    import concurrent.futures
+
+    from import_hacking_fixer import core
+
+    seen = []
+    real_executor = concurrent.futures.ProcessPoolExecutor
+
+    def executor(max_workers=None, **kwargs):
+        seen.append(max_workers)
+        return real_executor(max_workers=max_workers, **kwargs)
+
+    monkeypatch.setattr(concurrent.futures, "ProcessPoolExecutor", executor)
+    assert list(core.map_in_workers(pow, [2, 3], 2, workers=8)) == [4, 9]
+    assert seen == [2]
@@ -15,6 +15,26 @@ def test_extract_imports_from_file(tmp_path):
     assert len(imports) == 2
 
 
+def test_extract_imports_from_file_finds_nested_imports(tmp_path):
+    tmp_file = tmp_path / "mod.py"
+    tmp_file.write_text(
+        "import os\n"
+        "try:\n    import json\nexcept ImportError:\n    json = None\n"
+        "def f():\n    if os:\n        from sys import path\n    return [x for x in path]\n"
+    )
+    imports = extract_imports_from_file(str(tmp_file))
+    assert [node.lineno for node in imports] == [1, 3, 8]
+
+
+def test_extract_imports_from_file_reparses_modified_file(tmp_path):
+    tmp_file = tmp_path / "mod.py"
+    tmp_file.write_text("import os\n")
+    first = extract_imports_from_file(str(tmp_file))
+    assert extract_imports_from_file(str(tmp_file)) == first
+    tmp_file.write_text("import os\nimport sys\n")
+    assert len(extract_imports_from_file(str(tmp_file))) == 2
+
+
 def test_classify_imports(tmp_path):
     code = "import os\nimport random\nfrom mypkg import module\n"
     file = tmp_path / "sample2.py"
@@ -25,3 +45,76 @@ def test_classify_imports(tmp_path):
     assert results[0] == "stdlib"
     assert results[1] == "stdlib"
     assert results[2] == "local"
+
+
+def test_classify_import_caches_by_top_level_name():
+    from import_hacking_fixer.rules import _classify_name
+
+    _classify_name.cache_clear()
+    nodes = ast.parse("import os.path\nfrom os import sep\nimport os\n").body
+    assert [classify_import(node) for node in nodes] == ["stdlib"] * 3
+    info = _classify_name.cache_info()
+    assert (info.misses, info.hits) == (1, 2)
+
+
+def test_split_imports_groups_in_order():
+    from import_hacking_fixer.rules import split_imports
+
+    nodes = ast.parse("import os\nfrom . import sibling\nimport sys\n").body
+    grouped = split_imports(nodes)
+    assert grouped["stdlib"] == [nodes[0], nodes[2]]
+    assert grouped["local"] == [nodes[1]]
+    assert grouped["third_party"] == []
+
+
+def test_classify_import_uses_sys_path_scan(tmp_path, monkeypatch):
+    from import_hacking_fixer.rules import _classify_name, _path_buckets
+
+    (tmp_path / "localmod.py").write_text("")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    _path_buckets.cache_clear()
+    _classify_name.cache_clear()
+    try:
+        assert _path_buckets()["localmod"] == "local"
+        assert classify_import(ast.parse("import localmod.sub").body[0]) == "local"
+    finally:
+        _path_buckets.cache_clear()
+        _classify_name.cache_clear()
+
+
+def _statement_lines(source):
+    from import_hacking_fixer.parser import iter_statements
+
+    return [node.lineno for node in iter_statements(ast.parse(source)) if isinstance(node, ast.Expr)]
+
+
+def test_iter_statements_if_else_in_source_order():
+    assert _statement_lines("if x:\n    a\n    b\nelse:\n    c\nd\n") == [2, 3, 5, 6]
+
+
+def test_iter_statements_try_except_else_finally_in_source_order():
+    source = "try:\n    a\nexcept E:\n    b\nexcept F:\n    c\nelse:\n    d\nfinally:\n    e\nf\n"
+    assert _statement_lines(source) == [2, 4, 6, 8, 10, 11]
+
+
+def test_iter_statements_for_else_in_source_order():
+    assert _statement_lines("for i in x:\n    a\nelse:\n    b\nc\n") == [2, 4, 5]
+
+
+def test_path_buckets_resolve_symlinked_sys_path_entries(tmp_path, monkeypatch):
+    from import_hacking_fixer.rules import _classify_name, _path_buckets
+
+    project = tmp_path / "real" / "proj"
+    project.mkdir(parents=True)
+    (project / "symlinkedmod.py").write_text("")
+    (tmp_path / "lnk").symlink_to(tmp_path / "real")
+    monkeypatch.chdir(project)
+    monkeypatch.syspath_prepend(str(tmp_path / "lnk" / "proj"))
+    _path_buckets.cache_clear()
+    _classify_name.cache_clear()
+    try:
+        assert _path_buckets()["symlinkedmod"] == "local"
+    finally:
+        _path_buckets.cache_clear()
+        _classify_name.cache_clear()
@@ -18,3 +18,28 @@ def test_check_line_length_detects_long_lines(tmp_path):
     assert warnings
     assert "E501" in warnings[0][1]
 
+
+def test_read_line_length_config_from_tox_ini(tmp_path):
+    (tmp_path / "tox.ini").write_text("[flake8]\nmax-line-length = 120\n")
+    assert read_line_length_config(str(tmp_path)) == 120
+
+
+def test_read_line_length_config_default(tmp_path):
+    assert read_line_length_config(str(tmp_path)) == 79
+
+
+def test_check_line_length_uses_given_source(tmp_path):
+    source = "x = 1\n" + "y = '" + "b" * 90 + "'\n"
+    warnings = check_line_length(str(tmp_path / "missing.py"), 79, source)
+    assert [lineno for lineno, _ in warnings] == [2]
+    assert check_line_length(str(tmp_path / "missing.py"), 120, source) == []
+
+
+def test_read_line_length_config_skips_toml_without_length(tmp_path):
+    # Whether or not pyproject.toml mentions a line length for another tool
+    for index, toml in enumerate(("[tool.isort]\nprofile = 'black'\n", "[tool.ruff]\nline-length = 120\n")):
+        root = tmp_path / str(index)
+        root.mkdir()
+        (root / "pyproject.toml").write_text(toml)
+        (root / "setup.cfg").write_text("[flake8]\nmax-line-length = 100\n")
+        assert read_line_length_config(str(root)) == 100